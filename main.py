@@ -5,11 +5,15 @@ main.py — Entry point for SAGE
 import sys
 import time
 import os
+import json
+import hashlib
+import re
 from pathlib import Path
 import shutil
 import threading
 import runpy
 import subprocess
+from concurrent.futures import ThreadPoolExecutor
 
 ROOT_DIR = Path(__file__).resolve().parent
 OTERM_PATH = ROOT_DIR / "oterm"
@@ -20,62 +24,237 @@ def get_resource_path(name: str) -> str:
         return os.path.join(sys._MEIPASS, name)
     return os.path.abspath(name)
 
-def ensure_model_exists(model_name="sage_v0.9", modelfile="Modelfile", flag_file=".model_built"):
-    if Path(flag_file).exists():
-        print(f"[SAGE] Model already built. Skipping setup.")
-        return
+def _modelfile_quant(modelfile_path):
+    # Weights are referenced as e.g. FROM mistral:7b-instruct-v0.3-q4_K_M
+    # or FROM ./models/<name>.Q4_K_M.gguf
+    try:
+        text = Path(modelfile_path).read_text()
+    except OSError:
+        return None
+    match = re.search(r"^FROM\s+\S*?[.:-](q\d\w*?)(?:\.gguf)?\s*$", text, re.MULTILINE | re.IGNORECASE)
+    return match.group(1).upper() if match else None
 
-    if not shutil.which("ollama"):
-        print("[SAGE] Ollama is not installed or not in PATH.")
-        print("        → Please install it from https://ollama.com")
-        input("Press Enter to exit...")
-        sys.exit(1)
+def _model_listed(model_name):
+    """Return whether Ollama lists the model, or None if the check failed."""
+    listing = subprocess.Popen(["ollama", "list"], stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True)
+    stdout, _ = listing.communicate()
+    if listing.returncode != 0:
+        return None
+    return model_name in stdout
 
-    print(f"[SAGE] Checking for '{model_name}'...")
+def _build_stamp(model_name, modelfile_path):
+    # Keyed on the Modelfile's contents rather than its mtime: frozen builds
+    # re-extract it under sys._MEIPASS on every launch, giving it a new mtime.
+    try:
+        digest = hashlib.sha256(Path(modelfile_path).read_bytes()).hexdigest()
+    except OSError:
+        digest = None
+    return {"model": model_name, "modelfile": digest, "quant": _modelfile_quant(modelfile_path)}
+
+def _read_build_flag(flag_file):
+    """Return the stamp in the flag file, None if there is no flag file.
+
+    An unreadable or pre-JSON flag (older versions just touched the file)
+    comes back as {}: the model was built, but from an unknown Modelfile.
+    """
+    try:
+        text = Path(flag_file).read_text()
+    except FileNotFoundError:
+        return None
+    except OSError:
+        return {}
     try:
-        result = subprocess.run(["ollama", "list"], capture_output=True, text=True, check=True)
-        if model_name in result.stdout:
-            print(f"[SAGE] Model '{model_name}' exists.")
-            Path(flag_file).touch()
+        flag = json.loads(text)
+    except ValueError:
+        return {}
+    return flag if isinstance(flag, dict) else {}
+
+# Set by main() once the banner and keypress prompt are done with the terminal.
+# Until then the startup worker's output is held back so it can't write over them.
+_console_released = threading.Event()
+_console_lock = threading.Lock()
+_held_output = []
+
+# What the startup worker is doing, for main()'s "Waiting for..." message.
+_current_step = "the model check"
+
+def _write_console(data):
+    sys.stdout.flush()
+    sys.stdout.buffer.write(data)
+    sys.stdout.buffer.flush()
+
+def _emit(data):
+    with _console_lock:
+        if not _console_released.is_set():
+            _held_output.append(data)
             return
-    except subprocess.CalledProcessError:
-        print("[SAGE] Couldn't check existing Ollama models. Attempting build...")
+        _write_console(data)
+
+def _say(message):
+    _emit((message + "\n").encode(sys.stdout.encoding or "utf-8", errors="replace"))
+
+def _release_console():
+    with _console_lock:
+        _console_released.set()
+        if _held_output:
+            _write_console(b"".join(_held_output))
+            _held_output.clear()
+
+def _relay_output(stream):
+    """Copy subprocess output to the console as it arrives."""
+    for chunk in iter(lambda: stream.read1(4096), b""):
+        _emit(chunk)
+
+def ensure_model_exists(model_name="sage_v0.9", modelfile="Modelfile", flag_file=".model_built"):
+    """Make sure the SAGE model is registered with Ollama. Returns False on failure.
 
+    Runs on a worker thread while the banner is shown, so it must not prompt
+    the user, and reports through _say(); main() handles the exit once the
+    result is collected.
+    """
+    global _current_step
     modelfile_path = get_resource_path(modelfile)
-    print(f"[SAGE] Building model '{model_name}' from {modelfile_path}...")
+    stamp = _build_stamp(model_name, modelfile_path)
+    flag = _read_build_flag(flag_file)
+    if flag == stamp:
+        _say(f"[SAGE] Model already built. Skipping setup.")
+        return True
+
+    if not shutil.which("ollama"):
+        _say("[SAGE] Ollama is not installed or not in PATH.")
+        _say("        → Please install it from https://ollama.com")
+        return False
+
+    if flag is not None and flag.get("model", model_name) == model_name:
+        # We built this model before, from another (or an unrecorded) Modelfile.
+        _say(f"[SAGE] '{model_name}' was built from a different Modelfile. Rebuilding.")
+    else:
+        _say(f"[SAGE] Checking for '{model_name}'...")
+        _current_step = "the model check"
+        listed = _model_listed(model_name)
+        if listed:
+            _say(f"[SAGE] Model '{model_name}' exists.")
+            Path(flag_file).write_text(json.dumps(stamp))
+            return True
+        if listed is None:
+            _say("[SAGE] Couldn't check existing Ollama models. Attempting build...")
+
+    _say(f"[SAGE] Building model '{model_name}' from {modelfile_path}...")
+    _current_step = "the model build"
+    build = subprocess.Popen(["ollama", "create", model_name, "-f", modelfile_path], stdout=subprocess.PIPE, stderr=subprocess.STDOUT)
+    _relay_output(build.stdout)
+    if build.wait() != 0:
+        _say(f"[SAGE] Error creating model: 'ollama create' exited with status {build.returncode}.")
+        _current_step = "the model check"
+        if _model_listed(model_name):
+            # e.g. offline while upgrading: keep the previous build and retry
+            # next launch, since the flag is left as it was.
+            _say(f"[SAGE] Continuing with the existing '{model_name}' build.")
+            return True
+        return False
+    _say(f"[SAGE] Model '{model_name}' created successfully.")
+    Path(flag_file).write_text(json.dumps(stamp))
+    return True
+
+_WARMUP_SCRIPT = (
+    "import os, sys, urllib.request\n"
+    # Fork and let the parent exit at once (warm_model reaps it), so the
+    # request runs in a grandchild reparented to init. Otherwise it stays a
+    # child of the TUI after the exec and becomes a zombie when done.
+    "if hasattr(os, 'fork') and os.fork():\n"
+    "    os._exit(0)\n"
+    "req = urllib.request.Request(sys.argv[1], data=sys.argv[2].encode(),"
+    " headers={'Content-Type': 'application/json'})\n"
+    "urllib.request.urlopen(req, timeout=600).read()\n"
+)
+
+def warm_model(model_name="sage_v0.9"):
+    """Ask Ollama to load the model now so the first chat reply isn't a cold start.
+
+    A generate request without a prompt only loads the model. It is sent from a
+    detached interpreter so the request survives launch_tui() exec'ing over us.
+    """
+    if getattr(sys, 'frozen', False):
+        # sys.executable is the bundled app, not a Python interpreter.
+        return
+    host = os.environ.get("OLLAMA_HOST", "127.0.0.1:11434")
+    if "://" not in host:
+        host = f"http://{host}"
+    url = f"{host.rstrip('/')}/api/generate"
+    payload = json.dumps({"model": model_name, "keep_alive": "10m"})
     try:
-        subprocess.run(["ollama", "create", model_name, "-f", modelfile_path], check=True)
-        print(f"[SAGE] Model '{model_name}' created successfully.")
-        Path(flag_file).touch()
-    except subprocess.CalledProcessError as e:
-        print(f"[SAGE] Error creating model: {e}")
-        input("Press Enter to exit...")
-        sys.exit(1)
+        helper = subprocess.Popen(
+            [sys.executable, "-c", _WARMUP_SCRIPT, url, payload],
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+            start_new_session=True,
+        )
+    except OSError:
+        return
+    if hasattr(os, "fork"):
+        helper.wait()
+
+def prepare_model():
+    if not ensure_model_exists():
+        return False
+    warm_model()
+    return True
 
 def wait_for_keypress():
+    if not sys.stdin.isatty():
+        # Nothing to wait on (piped input, CI); don't block or touch termios.
+        return
     print("\nPress any key to continue.")
     try:
         # Windows-only
         import msvcrt
+        # Drop keys typed while the banner was printing.
+        while msvcrt.kbhit():
+            msvcrt.getch()
         msvcrt.getch()
     except ImportError:
         # Unix-like systems
+        import select
         import termios
-        import tty
         fd = sys.stdin.fileno()
         old_settings = termios.tcgetattr(fd)
+        # Only turn off line buffering and echo. Unlike tty.setraw this keeps
+        # ISIG, so Ctrl-C still raises KeyboardInterrupt, and OPOST, so output
+        # from the startup worker still renders normally.
+        new_settings = termios.tcgetattr(fd)
+        new_settings[3] &= ~(termios.ICANON | termios.ECHO)
+        new_settings[6][termios.VMIN] = 1
+        new_settings[6][termios.VTIME] = 0
         try:
-            tty.setraw(fd)
-            sys.stdin.read(1)
+            termios.tcsetattr(fd, termios.TCSANOW, new_settings)
+            termios.tcflush(fd, termios.TCIFLUSH)
+            # Sleep in select() rather than inside read(): a signal interrupts
+            # it and raises here, so the finally below restores the terminal.
+            select.select([fd], [], [])
+            os.read(fd, 1)
         finally:
+            # Arrow/function keys and non-ASCII chars are several bytes; drop
+            # the rest so it isn't read as input by the TUI we exec into.
+            termios.tcflush(fd, termios.TCIFLUSH)
             termios.tcsetattr(fd, termios.TCSADRAIN, old_settings)
             
 def launch_tui():
     print("[SAGE] Preparing interface...")
     tui_path = Path(__file__).resolve().parent / "oterm" / "src"
-    subprocess.run([sys.executable, "-m", "oterm.cli.oterm"], cwd=tui_path)
+    args = [sys.executable, "-m", "oterm.cli.oterm"]
+    if os.name == "nt":
+        # exec* on Windows spawns a new process and exits the parent, which
+        # hands the console back to the shell mid-session.
+        subprocess.run(args, cwd=tui_path)
+        return
+    # Replace this interpreter with the TUI rather than keeping it resident.
+    # exec skips interpreter shutdown, so flush anything still buffered.
+    sys.stdout.flush()
+    os.chdir(tui_path)
+    os.execvp(sys.executable, args)
 
-def main(): 
+def print_banner():
     print("\n")
     print("             :::====  :::===   :::===== :::=====")
     print("             :::     :::  === :::       :::     ")
@@ -93,11 +272,23 @@ def main():
     print("\n")
     print("----------------------------------------------------------------")
 
-    ensure_model_exists()
-    wait_for_keypress()
+def main():
+    # Check/build and pre-load the model in the background so the Ollama work
+    # overlaps with the banner and the keypress wait instead of preceding them.
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        model_ready = executor.submit(prepare_model)
+        try:
+            print_banner()
+            wait_for_keypress()
+        finally:
+            _release_console()
+        if not model_ready.done():
+            _say(f"[SAGE] Waiting for {_current_step} to finish...")
+        if not model_ready.result():
+            input("Press Enter to exit...")
+            sys.exit(1)
     launch_tui()
 
 if __name__ == "__main__":
-    import subprocess
     main()
 
@@ -10,17 +10,22 @@ Changes:
   straight into the chat for immediate model processing.
 """
 
+import asyncio
+import bisect
+import os
+import stat
+import time
+from collections.abc import Callable, Iterable, Iterator
+from functools import lru_cache
 from pathlib import Path
 from textual import on
 from textual.app import ComposeResult
 from textual.containers import Container, Horizontal, Vertical
 from textual.screen import ModalScreen
 from textual.widgets import DirectoryTree, Input, Label
+from textual.worker import Worker
 
-# File reading libraries
-import fitz       # PyMuPDF for PDF
-import docx       # python-docx for Word
-import openpyxl   # for Excel
+from oterm.utils import debounce
 
 MAX_CHARS = 20000  # keep under your context budget
 
@@ -29,44 +34,271 @@ def _truncate_for_model(text: str, limit: int = MAX_CHARS) -> tuple[str, bool]:
         return text, False
     return text[:limit], True
 
+# Pass-through: no instructions, just the file contents (bounded by markers)
+_MANIFEST_TMPL = "--- BEGIN MANIFEST: {fn} ---\n{body}\n--- END MANIFEST ---{note}"
+_TRUNCATED_NOTE = "\n\n[Note: Input truncated for initial pass.]"
+
 def _build_manifest_prompt(filename: str, body: str, truncated: bool) -> str:
-    # Pass-through: no instructions, just the file contents (bounded by markers)
-    note = "\n\n[Note: Input truncated for initial pass.]" if truncated else ""
-    return f"--- BEGIN MANIFEST: {filename} ---\n{body}\n--- END MANIFEST ---{note}"
+    note = _TRUNCATED_NOTE if truncated else ""
+    return _MANIFEST_TMPL.format(fn=filename, body=body, note=note)
 
 
+@lru_cache(maxsize=1)
 def get_default_pick_dir() -> Path:
     """Return a sensible default folder for file picker."""
     home = Path.home()
-    for sub in ("Downloads", "Documents"):
-        p = home / sub
-        if p.exists():
-            return p
+    candidates = ("Downloads", "Documents")
+    # One directory read instead of a stat per candidate; this matters when
+    # the home directory lives on a network share.
+    try:
+        with os.scandir(home) as entries:
+            found = {e.name for e in entries if e.name in candidates and e.is_dir()}
+    except OSError:
+        return home
+    for sub in candidates:
+        if sub in found:
+            return home / sub
     return home
 
+
+def _is_dir(path: Path) -> bool:
+    try:
+        return stat.S_ISDIR(os.stat(path).st_mode)
+    except (OSError, ValueError):
+        return False
+
 DEFAULT_ROOT = get_default_pick_dir()
 
-def load_manifest_text(path: Path) -> str:
-    """Load text from a manifest file depending on type."""
+def _join_until(chunks: Iterable[str], limit: int) -> str:
+    """Join chunks with newlines, stopping once `limit` chars have been collected.
+
+    When there is more input, the result overshoots `limit` by part of the last
+    chunk, so _truncate_for_model still detects and flags the truncation.
+    """
+    collected = []
+    total = -1  # no separator before the first chunk
+    for chunk in chunks:
+        collected.append(chunk)
+        total += len(chunk) + 1
+        if total > limit:
+            break
+    return "\n".join(collected)
+
+
+# Lower-cased markers of the fields the model looks for (origin, parties, codes).
+_MANIFEST_KEYWORDS = (
+    "origin",
+    "destination",
+    "shipper",
+    "consignee",
+    "hs code",
+    "eccn",
+    "invoice",
+    "purchase order",
+)
+
+
+# A long PDF is scanned for keyword pages up to this many times `limit` chars.
+_PDF_SCAN_FACTOR = 5
+
+
+def _has_keyword(text: str) -> bool:
+    lowered = text.lower()
+    return any(keyword in lowered for keyword in _MANIFEST_KEYWORDS)
+
+
+def _omitted(count: int) -> str:
+    return f"[... {count} page(s) omitted ...]"
+
+
+_PAGE_CUT = "[... rest of page omitted ...]"
+
+
+def _marker_room(count: int) -> int:
+    return len(_omitted(count)) + 1 if count else 0
+
+
+def _select_pdf_pages(
+    get_page: Callable[[int], str], page_count: int, limit: int
+) -> list[str]:
+    """Pick the PDF pages to hand to the model, in document order.
+
+    A document that fits in `limit` chars is passed through whole. For a longer
+    one, up to _PDF_SCAN_FACTOR * `limit` chars of page text are read, and the
+    pages mentioning a manifest keyword are kept first; the rest of the budget
+    is filled with the other pages read, in document order, cutting the first
+    page that doesn't fit. Each run of skipped pages is replaced by an
+    "[... N page(s) omitted ...]" marker so the model knows content is missing;
+    the markers count towards `limit`.
+    """
+    texts: list[str] = []
+    read = -1  # no separator before the first page
+    while len(texts) < page_count and read <= limit:
+        texts.append(get_page(len(texts)))
+        read += len(texts[-1]) + 1
+    if read <= limit:
+        return texts
+
+    matched = sum(len(t) + 1 for t in texts if _has_keyword(t))
+    while (
+        len(texts) < page_count and matched <= limit and read < limit * _PDF_SCAN_FACTOR
+    ):
+        texts.append(get_page(len(texts)))
+        read += len(texts[-1]) + 1
+        if _has_keyword(texts[-1]):
+            matched += len(texts[-1]) + 1
+
+    hits = {i for i, t in enumerate(texts) if _has_keyword(t)}
+    # Keyword pages first, then the others; each group in document order.
+    order = sorted(range(len(texts)), key=lambda i: i not in hits)
+    kept: list[int] = []  # sorted page indexes
+    cut: dict[int, str] = {}
+    used = -1 + _marker_room(page_count)
+    for i in order:
+        pos = bisect.bisect(kept, i)
+        prev = kept[pos - 1] if pos else -1
+        following = kept[pos] if pos < len(kept) else page_count
+        # Keeping page i splits the run of skipped pages around it in two.
+        cost = (
+            len(texts[i])
+            + 1
+            + _marker_room(i - prev - 1)
+            + _marker_room(following - i - 1)
+            - _marker_room(following - prev - 1)
+        )
+        if used + cost > limit:
+            room = limit - used - (cost - len(texts[i])) - len(_PAGE_CUT) - 1
+            if room > 0:
+                kept.insert(pos, i)
+                cut[i] = texts[i][:room]
+            break
+        kept.insert(pos, i)
+        used += cost
+    if not kept:
+        # Not even one page fits; keep the best one for _join_until to cut.
+        kept = [order[0]]
+
+    chunks = []
+    prev = -1
+    for i in kept:
+        if i - prev > 1:
+            chunks.append(_omitted(i - prev - 1))
+        if i in cut:
+            chunks += [cut[i], _PAGE_CUT]
+        else:
+            chunks.append(texts[i])
+        prev = i
+    if page_count - prev > 1:
+        chunks.append(_omitted(page_count - prev - 1))
+    return chunks
+
+
+def load_manifest_text(path: Path, limit: int = MAX_CHARS) -> str:
+    """Load text from a manifest file depending on type.
+
+    Stops reading pages/paragraphs/rows once roughly `limit` chars are collected;
+    long PDFs are narrowed to keyword pages first (see _select_pdf_pages).
+    The parsing libraries are imported on first use so they stay off the TUI
+    startup path when no manifest is picked.
+    """
     suffix = path.suffix.lower()
     if suffix in (".txt", ".csv", ".json"):
-        return path.read_text(encoding="utf-8", errors="ignore")
+        # A UTF-8 char is at most 4 bytes, so this is enough for `limit` chars.
+        with path.open("rb") as f:
+            return f.read(limit * 4).decode("utf-8", errors="ignore")
     elif suffix == ".pdf":
-        doc = fitz.open(path)
-        return "\n".join(page.get_text() for page in doc)
+        import fitz  # PyMuPDF
+
+        with fitz.open(path) as doc:
+
+            def page_text(i: int) -> str:
+                return doc.load_page(i).get_text("text", flags=fitz.TEXTFLAGS_TEXT)
+
+            pages = _select_pdf_pages(page_text, doc.page_count, limit)
+            return _join_until(pages, limit)
     elif suffix == ".docx":
+        import docx  # python-docx
+
         d = docx.Document(path)
-        return "\n".join(p.text for p in d.paragraphs)
+        return _join_until((p.text for p in d.paragraphs), limit)
     elif suffix in (".xlsx", ".xlsm"):
-        wb = openpyxl.load_workbook(path, read_only=True)
-        text_chunks = []
-        for sheet in wb:
-            for row in sheet.iter_rows(values_only=True):
-                text_chunks.append("\t".join(str(cell or "") for cell in row))
-        return "\n".join(text_chunks)
+        import openpyxl
+
+        # data_only reads the cached formula results instead of formula source.
+        wb = openpyxl.load_workbook(
+            path, read_only=True, data_only=True, keep_links=False
+        )
+        try:
+            rows = (
+                "\t".join("" if cell is None else str(cell) for cell in row)
+                for sheet in wb
+                for row in sheet.iter_rows(values_only=True)
+            )
+            return _join_until(rows, limit)
+        finally:
+            wb.close()
     else:
         return f"[Unsupported file type: {suffix}]"
 
+# path -> (st_mtime_ns, cached_at, [(entry, is_dir)]), shared by every picker.
+_listing_cache: dict[str, tuple[int, float, list[tuple[Path, bool]]]] = {}
+LISTING_CACHE_TTL = 60.0  # seconds; guards against filesystems with coarse mtimes
+
+
+class CachedDirectoryTree(DirectoryTree):
+    """DirectoryTree that reuses a directory's listing while its mtime is unchanged.
+
+    Each entry's is_dir() answer comes from the scandir that listed it, and
+    _safe_is_dir (which DirectoryTree calls per entry to sort and to build
+    nodes) is answered from that. Re-opening the picker, or going back to an
+    already visited folder, then costs one stat of the folder itself.
+    """
+
+    def __init__(self, *args, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self._known_dirs: dict[Path, bool] = {}
+
+    def _safe_is_dir(self, path: Path) -> bool:
+        is_dir = self._known_dirs.get(path)
+        if is_dir is None:
+            return super()._safe_is_dir(path)
+        return is_dir
+
+    def _directory_content(self, location: Path, worker: Worker) -> Iterator[Path]:
+        key = str(location)
+        now = time.monotonic()
+        entries = []
+        try:
+            mtime_ns = os.stat(location).st_mtime_ns
+            cached = _listing_cache.get(key)
+            if cached and cached[0] == mtime_ns and now - cached[1] < LISTING_CACHE_TTL:
+                entries = cached[2]
+            else:
+                with os.scandir(location) as it:
+                    for entry in it:
+                        if worker.is_cancelled:
+                            return
+                        try:
+                            is_dir = entry.is_dir()
+                        except PermissionError:
+                            is_dir = False
+                        entries.append((Path(entry.path), is_dir))
+                stale_keys = [
+                    k
+                    for k, v in _listing_cache.items()
+                    if now - v[1] >= LISTING_CACHE_TTL
+                ]
+                for stale in stale_keys:
+                    del _listing_cache[stale]
+                _listing_cache[key] = (mtime_ns, now, entries)
+        except PermissionError:
+            return
+
+        for path, is_dir in entries:
+            self._known_dirs[path] = is_dir
+            yield path
+
+
 class ImageSelect(ModalScreen[str]):
     """
     NOTE: Retained original class name for Oterm imports.
@@ -90,7 +322,8 @@ class ImageSelect(ModalScreen[str]):
     async def on_file_selected(self, ev: DirectoryTree.FileSelected) -> None:
         """When a file is picked, read text, wrap with instructions, and send to chat."""
         try:
-            raw = load_manifest_text(ev.path)
+            # Parsing large PDFs/workbooks can take seconds; keep the UI responsive.
+            raw = await asyncio.to_thread(load_manifest_text, ev.path)
             body, truncated = _truncate_for_model(raw)            # uses MAX_CHARS guard
             content = _build_manifest_prompt(ev.path.name, body, truncated)
         except Exception as e:
@@ -102,13 +335,18 @@ class ImageSelect(ModalScreen[str]):
 
 
     @on(Input.Changed)
+    @debounce(0.25)
     async def on_root_changed(self, ev: Input.Changed) -> None:
-        """Handle changes in root path input box."""
+        """Handle changes in root path input box.
+
+        Debounced so the tree is only re-populated once typing pauses.
+        """
         dt = self.query_one(DirectoryTree)
         path = Path(ev.value)
-        if not path.exists() or not path.is_dir():
+        if not await asyncio.to_thread(_is_dir, path):
             return
-        dt.path = path
+        if Path(dt.path) != path:
+            dt.path = path
 
     def compose(self) -> ComposeResult:
         """UI layout for file picker."""
@@ -118,4 +356,4 @@ class ImageSelect(ModalScreen[str]):
                     yield Label("Select a manifest for analysis:", classes="title")
                     yield Label("Root:")
                     yield Input(DEFAULT_ROOT.as_posix())
-                    yield DirectoryTree(DEFAULT_ROOT.as_posix())
+                    yield CachedDirectoryTree(DEFAULT_ROOT.as_posix())
@@ -0,0 +1,218 @@
+import os
+import zipfile
+from types import SimpleNamespace
+
+import pytest
+from textual.widgets import DirectoryTree
+
+from oterm.app import image_browser
+from oterm.app.image_browser import (
+    LISTING_CACHE_TTL,
+    CachedDirectoryTree,
+    _build_manifest_prompt,
+    _join_until,
+    _select_pdf_pages,
+    _truncate_for_model,
+    load_manifest_text,
+)
+
+
+def test_join_until_stops_once_limit_is_exceeded():
+    consumed = []
+
+    def chunks():
+        for chunk in ("aaaa", "bbbb", "cccc", "dddd"):
+            consumed.append(chunk)
+            yield chunk
+
+    text = _join_until(chunks(), limit=6)
+    assert text == "aaaa\nbbbb"
+    assert consumed == ["aaaa", "bbbb"]
+    assert _truncate_for_model(text, limit=6) == ("aaaa\nb", True)
+
+
+def test_join_until_exact_fit_is_not_truncated():
+    text = _join_until(["aaaa", "bb"], limit=7)
+    assert text == "aaaa\nbb"
+    assert _truncate_for_model(text, limit=7) == ("aaaa\nbb", False)
+
+
+def _pages(texts):
+    calls = []
+
+    def get_page(i):
+        calls.append(i)
+        return texts[i]
+
+    return get_page, calls
+
+
+def test_select_pdf_pages_keeps_small_documents_whole():
+    texts = [
+        "Commercial Invoice / Shipper",
+        "Line items: Widget x100",
+        "Authorized signature",
+    ]
+    get_page, _ = _pages(texts)
+    assert _select_pdf_pages(get_page, len(texts), limit=1000) == texts
+
+
+def test_select_pdf_pages_narrows_long_documents_in_order():
+    texts = ["Shipper: ACME", "x" * 50, "y" * 50, "Country of ORIGIN: DE", "z" * 50]
+    get_page, _ = _pages(texts)
+    assert _select_pdf_pages(get_page, len(texts), limit=100) == [
+        "Shipper: ACME",
+        "[... 2 page(s) omitted ...]",
+        "Country of ORIGIN: DE",
+        "[... 1 page(s) omitted ...]",
+    ]
+
+
+def test_select_pdf_pages_falls_back_to_leading_pages():
+    texts = ["a" * 40, "b" * 40, "c" * 40, "d" * 40]
+    get_page, _ = _pages(texts)
+    assert _select_pdf_pages(get_page, len(texts), limit=120) == [
+        "a" * 40,
+        "b" * 40,
+        "[... 2 page(s) omitted ...]",
+    ]
+
+
+def test_select_pdf_pages_bounds_the_scan():
+    texts = ["x" * 100] * 1000
+    get_page, calls = _pages(texts)
+    chunks = _select_pdf_pages(get_page, len(texts), limit=100)
+    # 5 * limit chars of page text are read before giving up on keywords.
+    assert len(calls) == 5
+    assert chunks == [
+        "x" * 39,
+        "[... rest of page omitted ...]",
+        "[... 999 page(s) omitted ...]",
+    ]
+
+
+def test_select_pdf_pages_fills_budget_around_keyword_pages():
+    # Just over budget, with the only keyword on the last page.
+    texts = ["p" * 110] * 9 + ["Invoice".ljust(110, ".")]
+    get_page, _ = _pages(texts)
+    chunks = _select_pdf_pages(get_page, len(texts), limit=1000)
+    assert chunks == texts[:7] + [
+        "p" * 53,
+        "[... rest of page omitted ...]",
+        "[... 1 page(s) omitted ...]",
+        texts[9],
+    ]
+    assert len("\n".join(chunks)) == 1000
+
+
+def test_load_manifest_text_reads_text_files(tmp_path):
+    path = tmp_path / "manifest.csv"
+    path.write_bytes("shipper,origin\r\nACME,München\r\n".encode())
+    assert load_manifest_text(path) == "shipper,origin\r\nACME,München\r\n"
+
+
+def test_load_manifest_text_bounds_text_reads(tmp_path):
+    path = tmp_path / "manifest.txt"
+    path.write_text("x" * 100)
+    text = load_manifest_text(path, limit=10)
+    assert text == "x" * 40
+    assert _truncate_for_model(text, limit=10) == ("x" * 10, True)
+
+
+def test_load_manifest_text_reads_workbook_values(tmp_path):
+    openpyxl = pytest.importorskip("openpyxl")
+    path = tmp_path / "manifest.xlsx"
+    wb = openpyxl.Workbook()
+    wb.active.append(["origin", 0, False, None, "DE"])
+    wb.active["A2"] = "=1+1"
+    wb.save(path)
+    # openpyxl doesn't compute formulas; store the result Excel would cache.
+    with zipfile.ZipFile(path) as src:
+        parts = {name: src.read(name) for name in src.namelist()}
+    sheet = "xl/worksheets/sheet1.xml"
+    parts[sheet] = parts[sheet].replace(b"<f>1+1</f><v></v>", b"<f>1+1</f><v>2</v>")
+    with zipfile.ZipFile(path, "w") as dst:
+        for name, data in parts.items():
+            dst.writestr(name, data)
+
+    assert load_manifest_text(path) == "origin\t0\tFalse\t\tDE\n2\t\t\t\t"
+
+
+def test_load_manifest_text_unsupported(tmp_path):
+    path = tmp_path / "manifest.bin"
+    path.write_bytes(b"\x00")
+    assert load_manifest_text(path) == "[Unsupported file type: .bin]"
+
+
+def test_build_manifest_prompt():
+    assert _build_manifest_prompt("m.txt", "body", False) == (
+        "--- BEGIN MANIFEST: m.txt ---\nbody\n--- END MANIFEST ---"
+    )
+    assert _build_manifest_prompt("m.txt", "body", True).endswith(
+        "\n\n[Note: Input truncated for initial pass.]"
+    )
+
+
+@pytest.fixture
+def listing(tmp_path, monkeypatch):
+    """A folder to list, with a fresh listing cache and a scandir call log."""
+    (tmp_path / "sub").mkdir()
+    (tmp_path / "manifest.txt").write_text("x")
+    monkeypatch.setattr(image_browser, "_listing_cache", {})
+    scanned = []
+    real_scandir = os.scandir
+
+    def scandir(path):
+        scanned.append(path)
+        return real_scandir(path)
+
+    monkeypatch.setattr(os, "scandir", scandir)
+    return scanned
+
+
+def _list(tree, location):
+    return sorted(
+        tree._directory_content(location, SimpleNamespace(is_cancelled=False))
+    )
+
+
+def test_directory_tree_reuses_unchanged_listing(tmp_path, listing):
+    expected = [tmp_path / "manifest.txt", tmp_path / "sub"]
+    assert _list(CachedDirectoryTree(tmp_path), tmp_path) == expected
+    # A new picker on the same, unchanged folder is served from the cache.
+    assert _list(CachedDirectoryTree(tmp_path), tmp_path) == expected
+    assert listing == [tmp_path]
+
+
+def test_directory_tree_relists_changed_directory(tmp_path, listing):
+    tree = CachedDirectoryTree(tmp_path)
+    _list(tree, tmp_path)
+    (tmp_path / "invoice.pdf").write_bytes(b"")
+    os.utime(tmp_path, ns=(0, 0))  # in case the mtime is too coarse to change
+    assert tmp_path / "invoice.pdf" in _list(tree, tmp_path)
+    assert listing == [tmp_path, tmp_path]
+
+
+def test_directory_tree_prunes_expired_listings(tmp_path, listing, monkeypatch):
+    now = 1000.0
+    monkeypatch.setattr(image_browser.time, "monotonic", lambda: now)
+    tree = CachedDirectoryTree(tmp_path)
+    _list(tree, tmp_path / "sub")
+    _list(tree, tmp_path)
+
+    now += LISTING_CACHE_TTL
+    _list(tree, tmp_path)
+    assert listing == [tmp_path / "sub", tmp_path, tmp_path]
+    assert list(image_browser._listing_cache) == [str(tmp_path)]
+
+
+def test_directory_tree_is_dir_comes_from_listing(tmp_path, listing, monkeypatch):
+    tree = CachedDirectoryTree(tmp_path)
+    _list(tree, tmp_path)
+
+    def stat_is_dir(path):
+        raise AssertionError(f"{path} was stat'ed again")
+
+    monkeypatch.setattr(DirectoryTree, "_safe_is_dir", staticmethod(stat_is_dir))
+    assert tree._safe_is_dir(tmp_path / "sub")
+    assert not tree._safe_is_dir(tmp_path / "manifest.txt")
@@ -0,0 +1,156 @@
+import importlib.util
+import json
+import os
+import queue
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from pathlib import Path
+
+import pytest
+
+MAIN_PATH = Path(__file__).resolve().parent.parent / "main.py"
+
+pytestmark = pytest.mark.skipif(
+    sys.platform == "win32", reason="uses a POSIX shell stub for ollama"
+)
+
+MODELFILE = "FROM mistral:7b-instruct-v0.3-q4_K_M\n\nPARAMETER temperature 0.7\n"
+
+
+@pytest.fixture
+def sage(tmp_path, monkeypatch):
+    """Load main.py in a scratch directory with a stub `ollama` on PATH."""
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "Modelfile").write_text(MODELFILE)
+    bin_dir = tmp_path / "bin"
+    bin_dir.mkdir()
+    stub = bin_dir / "ollama"
+    stub.write_text(
+        "#!/bin/sh\n"
+        'echo "$@" >> "$OLLAMA_STUB_LOG"\n'
+        'if [ "$1" = "list" ]; then echo NAME; echo "$OLLAMA_STUB_LIST"; fi\n'
+        'if [ "$1" = "create" ]; then exit "${OLLAMA_STUB_CREATE_STATUS:-0}"; fi\n'
+    )
+    stub.chmod(0o755)
+    monkeypatch.setenv("PATH", f"{bin_dir}{os.pathsep}{os.environ['PATH']}")
+    monkeypatch.setenv("OLLAMA_STUB_LOG", str(tmp_path / "calls.log"))
+    monkeypatch.setenv("OLLAMA_STUB_LIST", "")
+
+    spec = importlib.util.spec_from_file_location("sage_main", MAIN_PATH)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    module._release_console()
+    return module
+
+
+def ollama_calls(tmp_path):
+    log = tmp_path / "calls.log"
+    return log.read_text().splitlines() if log.exists() else []
+
+
+def test_matching_stamp_skips_ollama(sage, tmp_path):
+    assert sage.ensure_model_exists()
+    assert ollama_calls(tmp_path) == [
+        "list",
+        f"create sage_v0.9 -f {tmp_path / 'Modelfile'}",
+    ]
+
+    assert sage.ensure_model_exists()
+    assert len(ollama_calls(tmp_path)) == 2
+
+
+def test_stamp_ignores_modelfile_mtime(sage, tmp_path):
+    modelfile = tmp_path / "Modelfile"
+    stamp = sage._build_stamp("sage_v0.9", modelfile)
+    os.utime(modelfile, (1, 1))
+    assert sage._build_stamp("sage_v0.9", modelfile) == stamp
+
+    modelfile.write_text(MODELFILE + "PARAMETER top_p 0.9\n")
+    assert sage._build_stamp("sage_v0.9", modelfile) != stamp
+
+
+def test_changed_modelfile_rebuilds(sage, tmp_path):
+    assert sage.ensure_model_exists()
+    flag = json.loads((tmp_path / ".model_built").read_text())
+    assert flag["quant"] == "Q4_K_M"
+
+    (tmp_path / "Modelfile").write_text(MODELFILE + "PARAMETER top_p 0.9\n")
+    assert sage.ensure_model_exists()
+    assert [call.split()[0] for call in ollama_calls(tmp_path)] == [
+        "list",
+        "create",
+        "create",
+    ]
+
+
+def test_legacy_flag_rebuilds_existing_model(sage, tmp_path, monkeypatch):
+    # Installs from before the JSON stamp have an empty flag and a model that
+    # Ollama lists; they must still be rebuilt for the current Modelfile.
+    (tmp_path / ".model_built").touch()
+    monkeypatch.setenv("OLLAMA_STUB_LIST", "sage_v0.9:latest")
+
+    assert sage.ensure_model_exists()
+    assert [call.split()[0] for call in ollama_calls(tmp_path)] == ["create"]
+    flag = json.loads((tmp_path / ".model_built").read_text())
+    assert flag == sage._build_stamp("sage_v0.9", tmp_path / "Modelfile")
+
+
+def test_failed_upgrade_keeps_existing_model(sage, tmp_path, monkeypatch):
+    (tmp_path / ".model_built").touch()
+    monkeypatch.setenv("OLLAMA_STUB_LIST", "sage_v0.9:latest")
+    monkeypatch.setenv("OLLAMA_STUB_CREATE_STATUS", "1")
+
+    assert sage.ensure_model_exists()
+    assert [call.split()[0] for call in ollama_calls(tmp_path)] == ["create", "list"]
+    # Left as-is so the upgrade is retried on the next launch.
+    assert (tmp_path / ".model_built").read_text() == ""
+
+
+def test_missing_flag_adopts_listed_model(sage, tmp_path, monkeypatch):
+    monkeypatch.setenv("OLLAMA_STUB_LIST", "sage_v0.9:latest")
+
+    assert sage.ensure_model_exists()
+    assert ollama_calls(tmp_path) == ["list"]
+
+
+def test_status_is_held_until_console_release(sage, tmp_path, capfd):
+    sage._console_released.clear()
+    assert sage.ensure_model_exists()
+    assert capfd.readouterr().out == ""
+    assert sage._current_step == "the model build"
+
+    sage._release_console()
+    out = capfd.readouterr().out
+    assert out.startswith("[SAGE] Checking for 'sage_v0.9'...\n")
+    assert out.endswith("[SAGE] Model 'sage_v0.9' created successfully.\n")
+
+
+def test_warm_model_is_not_left_as_a_child(sage, monkeypatch):
+    requests = queue.Queue()
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            body = self.rfile.read(int(self.headers["Content-Length"]))
+            requests.put((self.path, json.loads(body)))
+            self.send_response(200)
+            self.end_headers()
+
+        def log_message(self, *args):
+            pass
+
+    server = HTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.handle_request, daemon=True).start()
+    monkeypatch.setenv("OLLAMA_HOST", f"127.0.0.1:{server.server_port}")
+    try:
+        sage.warm_model()
+        # The request is made by a grandchild, so nothing is left to reap here
+        # (or, after launch_tui's exec, in the TUI).
+        with pytest.raises(ChildProcessError):
+            os.waitpid(-1, os.WNOHANG)
+        assert requests.get(timeout=10) == (
+            "/api/generate",
+            {"model": "sage_v0.9", "keep_alive": "10m"},
+        )
+    finally:
+        server.server_close()